@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+
+import IPAParser
+
+class FeatureMatrix:
+    """A columnar view of a corpus: a languages x features count matrix (uint16),
+    a phonemes x features boolean matrix and a languages x phonemes count matrix,
+    all built from parse results.
+    Every distinct glyph is parsed once; phonemes with the same feature set share a row."""
+
+    def __init__(self, lang_dic):
+        """lang_dic maps language names to lists of phonemes, as in LangSearchEngine.lang_dic."""
+        self.langs = sorted(lang_dic)
+        phoneme_indices = {} # Frozenset -> row in phoneme_features.
+        glyph_indices = {}   # Glyph -> row in phoneme_features.
+        self.phoneme_keys = []
+        self.glyphs = []
+        occurrences = [] # (language row, phoneme row) pairs.
+        for i, lang in enumerate(self.langs):
+            for glyph in lang_dic[lang]:
+                if glyph not in glyph_indices:
+                    phoneme_key = frozenset(set.union(*IPAParser.parsePhon(glyph)))
+                    if phoneme_key not in phoneme_indices:
+                        phoneme_indices[phoneme_key] = len(self.phoneme_keys)
+                        self.phoneme_keys.append(phoneme_key)
+                        self.glyphs.append(glyph)
+                    glyph_indices[glyph] = phoneme_indices[phoneme_key]
+                occurrences.append((i, glyph_indices[glyph]))
+        self.features = sorted(set().union(*self.phoneme_keys))
+        self.feature_indices = {feature: i for i, feature in enumerate(self.features)}
+        self.phoneme_features = np.zeros((len(self.phoneme_keys), len(self.features)), dtype = bool)
+        for i, phoneme_key in enumerate(self.phoneme_keys):
+            self.phoneme_features[i, [self.feature_indices[feature] for feature in phoneme_key]] = True
+        self.lang_phonemes = np.zeros((len(self.langs), len(self.phoneme_keys)), dtype = np.uint16)
+        if occurrences:
+            rows, cols = np.array(occurrences).T
+            np.add.at(self.lang_phonemes, (rows, cols), 1)
+        self.counts = (self.lang_phonemes @ self.phoneme_features.astype(np.uint16)).astype(np.uint16)
+        self.lang_indices = {lang: i for i, lang in enumerate(self.langs)}
+
+    def _column(self, feature):
+        if feature not in self.feature_indices:
+            return np.zeros(len(self.langs), dtype = np.uint16)
+        return self.counts[:, self.feature_indices[feature]]
+
+    def _mask(self, *features):
+        """A boolean mask over phoneme rows having all the features."""
+        mask = np.ones(len(self.phoneme_keys), dtype = bool)
+        for feature in features:
+            if feature not in self.feature_indices:
+                return np.zeros(len(self.phoneme_keys), dtype = bool)
+            mask &= self.phoneme_features[:, self.feature_indices[feature]]
+        return mask
+
+    def feature_counts(self, feature):
+        """Returns a dict mapping languages to the number of their phonemes with this feature."""
+        return dict(zip(self.langs, self._column(feature).tolist()))
+
+    def threshold(self, feature, at_least = 1, at_most = None):
+        """Returns a set of languages with at_least to at_most phonemes having this feature."""
+        column = self._column(feature)
+        mask = column >= at_least
+        if at_most is not None:
+            mask &= column <= at_most
+        return {self.langs[i] for i in np.flatnonzero(mask)}
+
+    def combined_threshold(self, features, at_least = 1, at_most = None):
+        """Like threshold, but counts phonemes having all the features, e.g. ['plosive', 'glottalised']."""
+        column = self.lang_phonemes[:, self._mask(*features)].sum(axis = 1)
+        mask = column >= at_least
+        if at_most is not None:
+            mask &= column <= at_most
+        return {self.langs[i] for i in np.flatnonzero(mask)}
+
+    def group_counts(self):
+        """Returns a dict mapping features to the number of languages having at least one phoneme with it."""
+        return dict(zip(self.features, (self.counts > 0).sum(axis = 0).tolist()))
+
+    def histogram(self, feature):
+        """Returns an array whose n-th element is the number of languages with n phonemes having this feature."""
+        return np.bincount(self._column(feature))
+
+    def percentiles(self, feature, q = (25, 50, 75)):
+        """Percentiles of the per-language counts of this feature; NaNs if there are no languages."""
+        if not len(self.langs):
+            return np.full(np.shape(q), np.nan)
+        return np.percentile(self._column(feature), q)
+
+    def rating(self, feature):
+        """Returns (count, language) pairs for languages with this feature, highest first.
+        Every phoneme is counted, apical vowels, diphthongs and triphthongs included.
+        LangSearchEngine.feature_rating finds languages through the tables, which leave these out,
+        so it skips languages that have the feature only on them: for 'diphthong' it returns nothing."""
+        column = self._column(feature)
+        rating = [(int(column[i]), self.langs[i]) for i in np.flatnonzero(column)]
+        rating.sort(reverse = True)
+        return rating
+
+    def phonemes_with(self, *features):
+        """Returns a list of glyphs of phonemes having all the features.
+        There is one glyph per feature set, the first one seen in the corpus, e.g. 'g' but not 'ɡ'."""
+        return [self.glyphs[i] for i in np.flatnonzero(self._mask(*features))]
+
+    def save(self, directory):
+        """Saves the matrices and their labels as .npy files in the directory."""
+        os.makedirs(directory, exist_ok = True)
+        np.save(os.path.join(directory, 'counts.npy'), self.counts)
+        np.save(os.path.join(directory, 'phoneme_features.npy'), self.phoneme_features)
+        np.save(os.path.join(directory, 'lang_phonemes.npy'), self.lang_phonemes)
+        np.save(os.path.join(directory, 'langs.npy'), np.array(self.langs, dtype = str))
+        np.save(os.path.join(directory, 'features.npy'), np.array(self.features, dtype = str))
+        np.save(os.path.join(directory, 'glyphs.npy'), np.array(self.glyphs, dtype = str))
+
+    @classmethod
+    def load(cls, directory, mmap_mode = 'r'):
+        """Loads matrices saved with save(); by default they are memory-mapped read-only."""
+        matrix = cls.__new__(cls)
+        matrix.counts = np.load(os.path.join(directory, 'counts.npy'), mmap_mode = mmap_mode)
+        matrix.phoneme_features = np.load(os.path.join(directory, 'phoneme_features.npy'), mmap_mode = mmap_mode)
+        matrix.lang_phonemes = np.load(os.path.join(directory, 'lang_phonemes.npy'), mmap_mode = mmap_mode)
+        matrix.langs = np.load(os.path.join(directory, 'langs.npy')).tolist()
+        matrix.features = np.load(os.path.join(directory, 'features.npy')).tolist()
+        matrix.glyphs = np.load(os.path.join(directory, 'glyphs.npy')).tolist()
+        matrix.phoneme_keys = [frozenset(matrix.features[j] for j in np.flatnonzero(row)) for row in matrix.phoneme_features]
+        matrix.feature_indices = {feature: i for i, feature in enumerate(matrix.features)}
+        matrix.lang_indices = {lang: i for i, lang in enumerate(matrix.langs)}
+        return matrix
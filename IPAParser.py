@@ -133,6 +133,40 @@ POST_FEATURES = {
     '\u033a': 'apical'
 }
 
+# Substitutions applied before parsing.
+
+REPLACE_DICT = {
+    'ŝ': 'ƺ', # Internal convention — exchange for a singe non-IPA symbol.
+    'ẑ': 'ʓ', # Idem.
+    'z̩': 'ɿ',  # To parse as a vowel.
+    'ʐ̩': 'ʅ',  # Idem.
+    'z̩ʷ': 'ʮ', # Idem.
+    'ʐ̩ʷ': 'ʯ', # Idem.
+    '(': '',    # For marginal phonemes. Don't use this unless you really have to.
+    ')': ''
+}
+
+# Glyph -> feature name lookups derived from the tables above.
+# A dict lookup per glyph is faster than scanning the lists of sets; they are built on first use.
+
+_GLYPH_LOOKUPS = {}
+
+def glyphLookup(name):
+    """Returns a dict mapping glyphs to feature names for one of 'manner', 'place', 'openness', 'position'."""
+    if name not in _GLYPH_LOOKUPS:
+        tables, names = {
+            'manner':   (MANNERS, MANNERS_NAMES),
+            'place':    (PLACES, PLACES_NAMES),
+            'openness': (OPENNESS, OPENNESS_NAMES),
+            'position': (POSITIONS, POSITIONS_NAMES)
+        }[name]
+        lookup = {}
+        for i in range(len(tables)):
+            for glyph in tables[i]:
+                lookup.setdefault(glyph, names[i])
+        _GLYPH_LOOKUPS[name] = lookup
+    return _GLYPH_LOOKUPS[name]
+
 def parseCons(phon):
     # print("".join(phon)) # For finding bugs in descriptions.
     attributes = set()
@@ -142,19 +176,17 @@ def parseCons(phon):
         phon = phon[0]
         if phon == '\u026b':
             attributes.add('velarised')   
-        for i in range(len(MANNERS)):
-            if phon in MANNERS[i]:
-                attributes.add(MANNERS_NAMES[i])
-                break
+        manner = glyphLookup('manner').get(phon)
+        if manner:
+            attributes.add(manner)
     else:
         phon = phon[1]
         attributes.add('affricate')
         if phon in LATERAL_FRICATIVES:
             attributes.add('lateral')
-    for i in range(len(PLACES)):
-        if phon in PLACES[i]:
-            attributes.add(PLACES_NAMES[i])
-            break
+    place = glyphLookup('place').get(phon)
+    if place:
+        attributes.add(place)
     if phon in VOICED:
         attributes.add('voiced')
     else:
@@ -176,13 +208,12 @@ def parseVow(phon):
         return attributes
     else:
         phon = phon[0]
-        for i in range(len(POSITIONS)):
-            if phon in POSITIONS[i]:
-                attributes.add(POSITIONS_NAMES[i])
-                break
-        for i in range(len(OPENNESS)):
-            if phon in OPENNESS[i]:
-                attributes.add(OPENNESS_NAMES[i])
+        position = glyphLookup('position').get(phon)
+        if position:
+            attributes.add(position)
+        openness = glyphLookup('openness').get(phon)
+        if openness:
+            attributes.add(openness)
         if len(attributes) < 2:
             raise Exception("Vowel attributes under-parsed: " + phon)
         if phon in ROUNDED:
@@ -195,18 +226,8 @@ def parsePhon(phon):
     if ' ' in phon.strip():
         raise Exception('Blank space inside the phoneme! Check your commas: ' + phon)
     # Catch non-standard symbols and ignore brackets.
-    replaceDict = {
-        'ŝ': 'ƺ', # Internal convention — exchange for a singe non-IPA symbol.
-        'ẑ': 'ʓ', # Idem.
-        'z̩': 'ɿ',  # To parse as a vowel.
-        'ʐ̩': 'ʅ',  # Idem.
-        'z̩ʷ': 'ʮ', # Idem.
-        'ʐ̩ʷ': 'ʯ', # Idem.
-        '(': '',    # For marginal phonemes. Don't use this unless you really have to.
-        ')': ''
-    } 
-    for key in replaceDict:
-        phon = phon.replace(key, replaceDict[key])
+    for key in REPLACE_DICT:
+        phon = phon.replace(key, REPLACE_DICT[key])
     if len(phon) > 1:
         phonoset = set(phon)
         if 'w' in phonoset and phonoset.intersection(ALL_VOWELS):
@@ -1,7 +1,6 @@
 #! /usr/bin/env python3
 
 import sys
-import re
 from io import StringIO
 from IPAParser import parsePhon
 
@@ -13,6 +12,9 @@ CONS_COL_NAMES = ['bilabial', 'labial-velar', 'labial-palatal', 'labiodental', '
 VOW_ROW_NAMES = ['close', 'near-close', 'close-mid', 'mid', 'open-mid', 'near-open', 'open']
 VOW_COL_NAMES = ['front', 'near-front', 'central', 'near-back', 'back']
 
+# Diff kinds and tabulation keys of the vowels that are listed rather than tabulated.
+LISTED_VOWELS = [('apical_vowel', 'apical_vowels'), ('diphthong', 'diphthongs'), ('triphthong', 'triphthongs')]
+
 class Phoneme:
     """A phoneme unit consisting of a string representation and two frozensets of features.
     coreSet is used to draw a table; seriesSet is used to choose the appopriate table
@@ -99,9 +101,91 @@ def convert2HTML(twoDArr):
     out.append("</table>\n\n")
     return "".join(out)
 
-def processInventory(idiomName, phonoString):
-    """A function that takes a string of comma separated phonemes
-    as an input and them as a <div>."""
+def splitInventory(phonoString):
+    """Splits a string of comma separated phonemes, dropping the blanks around the commas.
+    Equivalent to splitting on commas with surrounding whitespace using re, without importing re."""
+    phons = phonoString.split(',')
+    for i in range(len(phons)):
+        if i > 0:
+            phons[i] = phons[i].lstrip()
+        if i < len(phons) - 1:
+            phons[i] = phons[i].rstrip()
+    return phons
+
+def seriesKey(phoneme):
+    """Returns the conClassDict/vowClassDict key of the series the phoneme belongs to."""
+    if phoneme.seriesSet:
+        return " & ".join(sorted(phoneme.seriesSet))
+    return "plain"
+
+def seriesFragment(key, table):
+    """Formats a series table together with its heading."""
+    return "<h3>" + key[0].upper() + key[1:] + " series:</h3>" + convert2HTML(table)
+
+def _addPhoneme(tabulation, phon):
+    """Parses a phoneme and files it into the tabulation.
+    Returns the (kind, key) of the affected series or None for polyphthongs and apical vowels."""
+    phoneme = Phoneme(phon, *parsePhon(phon))
+    if 'consonant' in phoneme.coreSet:
+        key = seriesKey(phoneme)
+        tabulation['conClassDict'].setdefault(key, []).append(phoneme)
+        return ('consonant', key)
+    elif 'vowel' in phoneme.coreSet:
+        if 'diphthong' in phoneme.coreSet:
+            tabulation['diphthongs'].append(phon)
+        elif 'triphthong' in phoneme.coreSet:
+            tabulation['triphthongs'].append(phon)
+        elif 'apical' in phoneme.coreSet:
+            tabulation['apical_vowels'].append(phon)
+        else:
+            key = seriesKey(phoneme)
+            tabulation['vowClassDict'].setdefault(key, []).append(phoneme)
+            return ('vowel', key)
+        return None
+    else:
+        raise Exception("Neither a vowel nor a consonant?")
+
+def _tabulateSeries(tabulation, kind, key):
+    """(Re)builds the table and the HTML fragment for a single series."""
+    if kind == 'consonant':
+        classDict, tables, fragments, makeTable = tabulation['conClassDict'], tabulation['conTables'], tabulation['conFragments'], makeTableCons
+    else:
+        classDict, tables, fragments, makeTable = tabulation['vowClassDict'], tabulation['vowTables'], tabulation['vowFragments'], makeTableVow
+    if classDict.get(key):
+        tables[key] = makeTable(classDict[key])
+        fragments[key] = seriesFragment(key, tables[key])
+    else:
+        classDict.pop(key, None)
+        tables.pop(key, None)
+        fragments.pop(key, None)
+
+def _tableCells(table):
+    """Maps (row, column) names to the non-empty cells of a 2-D array."""
+    cells = {}
+    if table is None:
+        return cells
+    for i in range(1, len(table)):
+        for j in range(1, len(table[0])):
+            if table[i][j]:
+                cells[(table[i][0], table[0][j])] = table[i][j]
+    return cells
+
+def _newTabulation(tabulation = None):
+    """Returns an empty tabulation or, if one is given, a copy that can be updated without touching the original."""
+    result = {}
+    for name in ('conClassDict', 'vowClassDict'):
+        result[name] = {key: list(value) for key, value in tabulation[name].items()} if tabulation else {}
+    for name in ('conTables', 'vowTables', 'conFragments', 'vowFragments'):
+        result[name] = dict(tabulation[name]) if tabulation else {}
+    for kind, name in LISTED_VOWELS:
+        result[name] = list(tabulation[name]) if tabulation else []
+    return result
+
+def tabulateInventory(phonoString):
+    """Parses a string of comma separated phonemes into a structured tabulation:
+    a dict holding the series dictionaries, their tables and HTML fragments,
+    and the lists of apical vowels, diphthongs and triphthongs.
+    It can be rendered with renderTabulation and updated with updateTabulation."""
 
     # Classifying phonemes: 
     # 0. Vowels vs. consonants
@@ -113,79 +197,90 @@ def processInventory(idiomName, phonoString):
     # 1.3. Triphthongs
     # 2. Consonants — with any combinations of secondary features.
 
-    # print(idiomName) # For finding bugs in descriptions.
+    tabulation = _newTabulation()
+    for phon in splitInventory(phonoString):
+        _addPhoneme(tabulation, phon)
+    for key in list(tabulation['conClassDict']):
+        _tabulateSeries(tabulation, 'consonant', key)
+    for key in list(tabulation['vowClassDict']):
+        _tabulateSeries(tabulation, 'vowel', key)
+    return tabulation
 
-    conClassDict  = {}
-    vowClassDict  = {}
-    diphthongs    = []
-    triphthongs   = []
-    consonants    = []
-    vowels        = []
-    apical_vowels = []
-
-    inputPhons = re.split(r'\s*,\s*', phonoString)
-
-    for phon in inputPhons:
-        phoneme = Phoneme(phon, *parsePhon(phon))
-        if 'consonant' in phoneme.coreSet:
-            consonants.append(phoneme)
-            if phoneme.seriesSet:
-                classMarker = " & ".join(sorted(phoneme.seriesSet))
-            else:
-                classMarker = "plain"
-            if classMarker in conClassDict:
-                conClassDict[classMarker].append(phoneme)
-            else:
-                conClassDict[classMarker] = []
-                conClassDict[classMarker].append(phoneme)
-        elif 'vowel' in phoneme.coreSet:
-            if 'diphthong' in phoneme.coreSet:
-                diphthongs.append(phon)
-            elif 'triphthong' in phoneme.coreSet:
-                triphthongs.append(phon)
-            elif 'apical' in phoneme.coreSet:
-                apical_vowels.append(phon)
-            else:
-                vowels.append(phoneme)
-                if phoneme.seriesSet:
-                    classMarker = " & ".join(sorted(phoneme.seriesSet))
-                else:
-                    classMarker = "plain"
-                if classMarker in vowClassDict:
-                    vowClassDict[classMarker].append(phoneme)
-                else:
-                    vowClassDict[classMarker] = []
-                    vowClassDict[classMarker].append(phoneme)
-        else:
-            raise Exception("Neither a vowel nor a consonant?")
+def updateTabulation(tabulation, added = (), removed = ()):
+    """Applies an inventory diff to a tabulation produced by tabulateInventory.
+    Only the added phonemes are parsed and only the affected series are re-tabulated;
+    the fragments of the other series are reused as is. The original tabulation is not modified.
+    Returns the new tabulation and a list of changes as
+    (kind, series key, row, column, old value, new value) tuples.
+    For table cells kind is 'consonant' or 'vowel' and empty cells are represented by ''.
+    For the lists of apical vowels, diphthongs and triphthongs kind is 'apical_vowel',
+    'diphthong' or 'triphthong', the key, row and column are None and the values
+    are the lists as rendered, e.g. 'ai, au'."""
+    result = _newTabulation(tabulation)
+    affected = set()
+    removed = {phon.strip() for phon in removed}
+    for kind, classDict in (('consonant', result['conClassDict']), ('vowel', result['vowClassDict'])):
+        for key in classDict:
+            remaining = [phoneme for phoneme in classDict[key] if str(phoneme) not in removed]
+            if len(remaining) < len(classDict[key]):
+                classDict[key] = remaining
+                affected.add((kind, key))
+    for kind, name in LISTED_VOWELS:
+        result[name] = [phon for phon in result[name] if phon not in removed]
+    for phon in added:
+        series = _addPhoneme(result, phon.strip())
+        if series is not None:
+            affected.add(series)
+    diff = []
+    for kind, key in sorted(affected):
+        _tabulateSeries(result, kind, key)
+        tables = result['conTables'] if kind == 'consonant' else result['vowTables']
+        oldTables = tabulation['conTables'] if kind == 'consonant' else tabulation['vowTables']
+        oldCells = _tableCells(oldTables.get(key))
+        newCells = _tableCells(tables.get(key))
+        for cell in sorted(set(oldCells).union(newCells)):
+            if oldCells.get(cell, '') != newCells.get(cell, ''):
+                diff.append((kind, key, cell[0], cell[1], oldCells.get(cell, ''), newCells.get(cell, '')))
+    for kind, name in LISTED_VOWELS:
+        if result[name] != tabulation[name]:
+            diff.append((kind, None, None, None, ", ".join(tabulation[name]), ", ".join(result[name])))
+    return result, diff
 
+def renderTabulation(idiomName, tabulation):
+    """Formats a tabulation produced by tabulateInventory as a <div>."""
     out = StringIO()
     out.write('<div><h1>%s</h1>' % idiomName)
-    if conClassDict:
+    if tabulation['conFragments']:
         out.write("<h2>Consonants</h2>")
-        keys = sorted(conClassDict.keys(), key = lambda x: len(x))
+        keys = sorted(tabulation['conClassDict'].keys(), key = lambda x: len(x))
         for key in keys:
-            out.write("<h3>" + key[0].upper() + key[1:] + " series:</h3>")
-            out.write(convert2HTML(makeTableCons(conClassDict[key])))
-    if vowClassDict:
+            out.write(tabulation['conFragments'][key])
+    if tabulation['vowFragments']:
         out.write("<h2>Vowels</h2>")
-        keys = sorted(vowClassDict.keys(), key = lambda x: len(x))
+        keys = sorted(tabulation['vowClassDict'].keys(), key = lambda x: len(x))
         for key in keys:
-            out.write("<h3>" + key[0].upper() + key[1:] + " series:</h3>")
-            out.write(convert2HTML(makeTableVow(vowClassDict[key])))
-    if apical_vowels:
+            out.write(tabulation['vowFragments'][key])
+    if tabulation['apical_vowels']:
         out.write("<h3>Apical vowels:</h3>")
-        out.write("<p>" + ", ".join(str(el) for el in apical_vowels))
-    if diphthongs:
+        out.write("<p>" + ", ".join(str(el) for el in tabulation['apical_vowels']))
+    if tabulation['diphthongs']:
         out.write("<h3>Diphthongs:</h3>")
-        out.write("<p>" + ", ".join(str(el) for el in diphthongs))
-    if triphthongs:
+        out.write("<p>" + ", ".join(str(el) for el in tabulation['diphthongs']))
+    if tabulation['triphthongs']:
         out.write("<h3>Triphthongs:</h3>")
-        out.write("<p>" + ", ".join(str(el) for el in triphthongs))
+        out.write("<p>" + ", ".join(str(el) for el in tabulation['triphthongs']))
     out.write('</div>')
 
     return out.getvalue()
 
+def processInventory(idiomName, phonoString):
+    """A function that takes a string of comma separated phonemes
+    as an input and them as a <div>."""
+
+    # print(idiomName) # For finding bugs in descriptions.
+
+    return renderTabulation(idiomName, tabulateInventory(phonoString))
+
 # Test client
 if __name__ == '__main__':
     phons = "a, b, c, d, e, f, g"
@@ -1,7 +1,20 @@
+import heapq
+
 import IPAParser
 from IPATabulator import CONS_ROW_NAMES, CONS_COL_NAMES
 from IPATabulator import VOW_ROW_NAMES, VOW_COL_NAMES
 
+# Lookup tables shared by all engines; computed once per process.
+
+CONS_X_COORDS = {name: i for i, name in enumerate(CONS_COL_NAMES)}
+CONS_Y_COORDS = {name: i for i, name in enumerate(CONS_ROW_NAMES)}
+VOW_X_COORDS = {name: i for i, name in enumerate(VOW_COL_NAMES)}
+VOW_Y_COORDS = {name: i for i, name in enumerate(VOW_ROW_NAMES)}
+CONS_ROWS = frozenset(CONS_ROW_NAMES)
+CONS_COLS = frozenset(CONS_COL_NAMES)
+VOW_ROWS = frozenset(VOW_ROW_NAMES)
+VOW_COLS = frozenset(VOW_COL_NAMES)
+
 class LangSearchEngine:
     """Objects of this class know which languages have which phonemes."""
 
@@ -9,25 +22,19 @@ class LangSearchEngine:
         self.lang_dic = {}
         self.all_langs = set()
         self.all_phonemes = {} # Frozenset -> glyph map. Needed for feature search.
+        self.phoneme_langs = {} # Frozenset -> languages of the tabulated phonemes, shared with the tables.
         # Prepairing tables for lookup.
         self.cons_table = [[{} for i in CONS_COL_NAMES] for j in CONS_ROW_NAMES]
-        self.cons_x_coords = {}
-        for pair in enumerate(CONS_COL_NAMES):
-            self.cons_x_coords[pair[1]] = pair[0]
-        self.cons_y_coords = {}
-        for pair in enumerate(CONS_ROW_NAMES):
-            self.cons_y_coords[pair[1]] = pair[0]
         self.vow_table = [[{} for i in VOW_COL_NAMES] for j in VOW_ROW_NAMES]
-        self.vow_x_coords = {}
-        for pair in enumerate(VOW_COL_NAMES):
-            self.vow_x_coords[pair[1]] = pair[0]
-        self.vow_y_coords = {}
-        for pair in enumerate(VOW_ROW_NAMES):
-            self.vow_y_coords[pair[1]] = pair[0]
-        self.cons_rows = set(CONS_ROW_NAMES)
-        self.cons_cols = set(CONS_COL_NAMES)
-        self.vow_rows = set(VOW_ROW_NAMES)
-        self.vow_cols = set(VOW_COL_NAMES)
+        # Name -> coordinate maps are shared by all engines.
+        self.cons_x_coords = CONS_X_COORDS
+        self.cons_y_coords = CONS_Y_COORDS
+        self.vow_x_coords = VOW_X_COORDS
+        self.vow_y_coords = VOW_Y_COORDS
+        self.cons_rows = CONS_ROWS
+        self.cons_cols = CONS_COLS
+        self.vow_rows = VOW_ROWS
+        self.vow_cols = VOW_COLS
 
     def add_language(self, lang_name, phonemes):
         self.lang_dic[lang_name] = phonemes
@@ -48,6 +55,7 @@ class LangSearchEngine:
                 x_coord = self.vow_x_coords[row]
                 if phoneme_key not in self.vow_table[y_coord][x_coord]:
                     self.vow_table[y_coord][x_coord][phoneme_key] = (glyph, [])
+                    self.phoneme_langs[phoneme_key] = self.vow_table[y_coord][x_coord][phoneme_key][1]
                 self.vow_table[y_coord][x_coord][phoneme_key][1].append(lang_name)
             else:
                 try:
@@ -59,6 +67,7 @@ class LangSearchEngine:
                 x_coord = self.cons_x_coords[place]
                 if phoneme_key not in self.cons_table[y_coord][x_coord]:
                     self.cons_table[y_coord][x_coord][phoneme_key] = (glyph, [])
+                    self.phoneme_langs[phoneme_key] = self.cons_table[y_coord][x_coord][phoneme_key][1]
                 self.cons_table[y_coord][x_coord][phoneme_key][1].append(lang_name)
 
     def IPA_exact_query(self, phoneme_string):
@@ -91,6 +100,14 @@ class LangSearchEngine:
     def IPA_query(self, phoneme_string):
         """Returns a dictionary with languages containing this phoneme and its derivatives."""
 
+        result = {}
+        for glyph, langs in self.IPA_query_by_key(phoneme_string).values():
+            result[glyph] = langs
+        return result
+
+    def IPA_query_by_key(self, phoneme_string):
+        """The same as IPA_query, but keyed by phoneme feature sets: frozenset -> (glyph, languages)."""
+
         phoneme = set.union(*IPAParser.parsePhon(phoneme_string))
         result = {}
         if 'vowel' in phoneme:
@@ -100,24 +117,17 @@ class LangSearchEngine:
             y_coord = self.vow_y_coords[height]
             row = phoneme.intersection(self.vow_cols).pop()
             x_coord = self.vow_x_coords[row]
-            for key in self.vow_table[y_coord][x_coord]:
-                if key.issuperset(phoneme):
-                    glyph = self.vow_table[y_coord][x_coord][key][0]
-                    langs = self.vow_table[y_coord][x_coord][key][1]
-                    result[glyph] = langs
-            return result
+            cell = self.vow_table[y_coord][x_coord]
         else:
             manner = phoneme.intersection(self.cons_rows).pop()
             y_coord = self.cons_y_coords[manner]
             place = phoneme.intersection(self.cons_cols).pop()
             x_coord = self.cons_x_coords[place]
-            for key in self.cons_table[y_coord][x_coord]:
-                if key.issuperset(phoneme):
-                    glyph = self.cons_table[y_coord][x_coord][key][0]
-                    langs = self.cons_table[y_coord][x_coord][key][1]
-                    result[glyph] = langs
-            return result
-        raise Exception("Unreachable!")
+            cell = self.cons_table[y_coord][x_coord]
+        for key in cell:
+            if key.issuperset(phoneme):
+                result[key] = cell[key]
+        return result
 
     def IPA_query_multiple(self, *args):
         result = set()
@@ -164,17 +174,18 @@ class LangSearchEngine:
             for feature in positive:
                 feature = set(feature.split())
                 temp = set()
-                for key in self.all_phonemes:
+                # Derivatives of a phoneme with the feature have it too, so each phoneme's own languages suffice.
+                for key in self.phoneme_langs:
                     if feature.issubset(key):
-                        temp.update(self._dict2set(self.IPA_query(self.all_phonemes[key])))
+                        temp.update(self.phoneme_langs[key])
                 all_positives.append(temp)
             result = set.intersection(*all_positives)
         for feature in negative:
             print(feature)
             feature = set(feature.split())
-            for key in self.all_phonemes:
+            for key in self.phoneme_langs:
                 if feature.issubset(key):
-                    result = result.difference(self._dict2set(self.IPA_query(self.all_phonemes[key])))
+                    result = result.difference(self.phoneme_langs[key])
         return result
 
     def feature_query_stat(self):
@@ -191,7 +202,7 @@ class LangSearchEngine:
         feature_havers = {}
         for lang in self.features_query(feature):
             counter = 0
-            for phon in engine.lang_dic[lang]:
+            for phon in self.lang_dic[lang]:
                 if feature in set.union(*IPAParser.parsePhon(phon)):
                     counter += 1
             feature_havers[lang] = counter
@@ -204,6 +215,189 @@ class LangSearchEngine:
     def IPA_query_rating(self):
         pass # todo
 
+    def feature_matrix(self):
+        """Returns a FeatureMatrix of the languages added so far. Requires numpy."""
+        from FeatureMatrix import FeatureMatrix
+        return FeatureMatrix(self.lang_dic)
+
+class _Shard:
+    """The worker side of a ShardedLangSearchEngine: a partial engine
+    that knows languages by the integer ids the parent assigns to them."""
+
+    def __init__(self):
+        self.engine = LangSearchEngine()
+        self.glyphs = {}      # Glyph -> glyph, so that all languages share one string per glyph.
+        self.first_langs = {} # Frozenset -> id of the first language with this phoneme.
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    def add_language(self, lang_id, phonemes):
+        phonemes = [self.glyphs.setdefault(glyph, glyph) for glyph in phonemes]
+        known = len(self.engine.all_phonemes)
+        try:
+            self.engine.add_language(lang_id, phonemes)
+        finally:
+            for key in list(self.engine.all_phonemes)[known:]:
+                self.first_langs[key] = lang_id
+
+    def lang_dic(self):
+        return self.engine.lang_dic
+
+    def all_phonemes(self):
+        return {key: (glyph, self.first_langs[key]) for key, glyph in self.engine.all_phonemes.items()}
+
+def _shard_worker(conn):
+    """Serves method calls on a _Shard until it receives None."""
+    shard = _Shard()
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        method, args = request
+        try:
+            conn.send((True, getattr(shard, method)(*args)))
+        except Exception as e:
+            conn.send((False, e))
+    conn.close()
+
+class ShardedLangSearchEngine:
+    """A LangSearchEngine whose languages are partitioned across worker processes.
+    Every shard holds a partial engine; queries are sent to all shards and the
+    results are merged. Call close() or use the engine as a context manager
+    to stop the workers.
+
+    Workers know languages by integer ids given in the order of addition, so only
+    ids cross the pipes, and partial results, each already in that order, are merged
+    without sorting. lang_dic and all_phonemes are gathered from the shards on access."""
+
+    def __init__(self, n_shards):
+        import multiprocessing # Only sharded engines pay for the import.
+
+        if n_shards < 1:
+            raise Exception("At least one shard is needed")
+        self.all_langs = set()
+        self.lang_ids = {}   # Language -> id; the shard is id % n_shards.
+        self.lang_names = [] # Id -> language.
+        self.connections = []
+        self.processes = []
+        for i in range(n_shards):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target = _shard_worker, args = (child_conn,), daemon = True)
+            process.start()
+            child_conn.close()
+            self.connections.append(parent_conn)
+            self.processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _check_open(self):
+        if not self.connections:
+            raise Exception("The engine is closed")
+
+    def _call(self, shard, method, *args):
+        self._check_open()
+        self.connections[shard].send((method, args))
+        success, result = self.connections[shard].recv()
+        if not success:
+            raise result
+        return result
+
+    def _scatter(self, method, *args):
+        """Sends the call to every shard first and then gathers the results.
+        All replies are read before an error is raised so that none is left in a pipe."""
+        self._check_open()
+        for conn in self.connections:
+            conn.send((method, args))
+        replies = [conn.recv() for conn in self.connections]
+        for success, result in replies:
+            if not success:
+                raise result
+        return [result for success, result in replies]
+
+    def _names(self, ids):
+        return [self.lang_names[i] for i in ids]
+
+    def add_language(self, lang_name, phonemes):
+        self._check_open()
+        # The name is recorded before parsing, as in a single engine.
+        self.all_langs.add(lang_name)
+        if lang_name not in self.lang_ids:
+            self.lang_ids[lang_name] = len(self.lang_names)
+            self.lang_names.append(lang_name)
+        lang_id = self.lang_ids[lang_name]
+        self._call(lang_id % len(self.connections), 'add_language', lang_id, phonemes)
+
+    @property
+    def lang_dic(self):
+        partial = {}
+        for shard_dic in self._scatter('lang_dic'):
+            partial.update(shard_dic)
+        return {self.lang_names[i]: partial[i] for i in sorted(partial)}
+
+    @property
+    def all_phonemes(self):
+        merged = {} # Frozenset -> (glyph, id of the first language with it).
+        for partial in self._scatter('all_phonemes'):
+            for key, (glyph, lang_id) in partial.items():
+                if key not in merged or lang_id < merged[key][1]:
+                    merged[key] = (glyph, lang_id)
+        return {key: glyph for key, (glyph, lang_id) in sorted(merged.items(), key = lambda item: item[1][1])}
+
+    def IPA_exact_query(self, phoneme_string):
+        """Returns a list of languages containing this phoneme."""
+
+        partials = self._scatter('IPA_exact_query', phoneme_string)
+        if isinstance(partials[0], dict):
+            return {} # Apical vowels and polyphthongs, as in a single engine.
+        return self._names(heapq.merge(*partials))
+
+    def IPA_query(self, phoneme_string):
+        """Returns a dictionary with languages containing this phoneme and its derivatives."""
+
+        found = {} # Frozenset -> [(glyph, ids)] from every shard that has the phoneme.
+        for partial in self._scatter('IPA_query_by_key', phoneme_string):
+            for key, cell in partial.items():
+                found.setdefault(key, []).append(cell)
+        result = {}
+        for cells in found.values():
+            # The glyph comes from the language that was added first, as in a single engine.
+            glyph = min(cells, key = lambda cell: cell[1][0])[0]
+            result[glyph] = self._names(heapq.merge(*[ids for _, ids in cells]))
+        return result
+
+    def IPA_query_multiple(self, *args):
+        # Each language lives in a single shard, so partial results are disjoint.
+        return set(self._names(set.union(*self._scatter('IPA_query_multiple', *args))))
+
+    def features_query(self, *args):
+        return set(self._names(set.union(*self._scatter('features_query', *args))))
+
+    def feature_rating(self, feature):
+        rating = []
+        for partial in self._scatter('feature_rating', feature):
+            rating.extend((count, self.lang_names[lang_id]) for count, lang_id in partial)
+        rating.sort(reverse = True)
+        return rating
+
+    def feature_matrix(self):
+        """Returns a FeatureMatrix of the languages added so far. Requires numpy."""
+        from FeatureMatrix import FeatureMatrix
+        return FeatureMatrix(self.lang_dic)
+
+    def close(self):
+        for conn in self.connections:
+            conn.send(None)
+            conn.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
 # Test code
 
 if __name__ == '__main__':
@@ -0,0 +1,69 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from FeatureMatrix import FeatureMatrix
+from PhonoSearchLib import LangSearchEngine
+
+LANG_DIC = {
+    'A': ['p', 't', 'k', 'pʼ', 'tʼ', 'kʼ', 'm', 'a', 'i', 'u'],
+    'B': ['p', 'b', 't', 'd', 'k', 'g', 'n', 's', 'a', 'e', 'o'],
+    'C': ['t', 'k', 'tʼ', 'sʼ', 'n', 'a', 'i'],
+    'D': ['ɡ', 'm', 'n', 'ŋ', 'a', 'i', 'iː']
+}
+
+@pytest.fixture
+def matrix():
+    return FeatureMatrix(LANG_DIC)
+
+def test_counts(matrix):
+    assert matrix.counts.dtype == np.uint16
+    assert matrix.feature_counts('glottalised') == {'A': 3, 'B': 0, 'C': 2, 'D': 0}
+    assert matrix.feature_counts('nasal') == {'A': 1, 'B': 1, 'C': 1, 'D': 3}
+
+def test_threshold(matrix):
+    assert matrix.threshold('glottalised') == {'A', 'C'}
+    assert matrix.threshold('glottalised', at_least = 3) == {'A'}
+    assert matrix.threshold('nasal', at_least = 1, at_most = 1) == {'A', 'B', 'C'}
+    assert matrix.threshold('no-such-feature') == set()
+
+def test_combined_threshold(matrix):
+    assert matrix.combined_threshold(['plosive', 'glottalised']) == {'A', 'C'}
+    assert matrix.combined_threshold(['plosive', 'glottalised'], at_least = 2) == {'A'}
+    assert matrix.combined_threshold(['fricative', 'glottalised']) == {'C'}
+
+def test_group_counts(matrix):
+    counts = matrix.group_counts()
+    assert counts['vowel'] == 4
+    assert counts['glottalised'] == 2
+    assert counts['long'] == 1
+
+def test_histogram_and_percentiles(matrix):
+    assert matrix.histogram('glottalised').tolist() == [2, 0, 1, 1]
+    assert matrix.percentiles('nasal', [0, 50, 100]).tolist() == [1, 1, 3]
+
+def test_percentiles_of_empty_corpus():
+    assert np.isnan(FeatureMatrix({}).percentiles('nasal')).all()
+
+def test_rating_matches_engine(matrix):
+    engine = LangSearchEngine()
+    for lang, phonemes in LANG_DIC.items():
+        engine.add_language(lang, phonemes)
+    for feature in ['glottalised', 'nasal', 'vowel', 'plosive', 'long']:
+        assert matrix.rating(feature) == engine.feature_rating(feature)
+    assert engine.feature_matrix().rating('nasal') == matrix.rating('nasal')
+
+def test_phonemes_with(matrix):
+    assert sorted(matrix.phonemes_with('plosive', 'glottalised')) == ['kʼ', 'pʼ', 'tʼ']
+    assert 'ɡ' not in matrix.phonemes_with('velar', 'voiced')
+
+def test_save_and_load(matrix, tmp_path):
+    matrix.save(str(tmp_path))
+    loaded = FeatureMatrix.load(str(tmp_path))
+    assert isinstance(loaded.counts, np.memmap)
+    assert isinstance(loaded.lang_phonemes, np.memmap)
+    assert loaded.threshold('glottalised', at_least = 3) == matrix.threshold('glottalised', at_least = 3)
+    assert loaded.combined_threshold(['plosive', 'glottalised']) == matrix.combined_threshold(['plosive', 'glottalised'])
+    assert loaded.group_counts() == matrix.group_counts()
+    assert loaded.rating('nasal') == matrix.rating('nasal')
+    assert loaded.phonemes_with('plosive', 'glottalised') == matrix.phonemes_with('plosive', 'glottalised')
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import IPAParser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Limit in seconds on importing a module and parsing the first phoneme in a fresh interpreter
+# with warm bytecode caches; the best of COLD_START_RUNS is compared.
+COLD_START_LIMIT = 0.005
+COLD_START_RUNS = 3
+
+COLD_START_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import {module}
+import IPAParser
+IPAParser.parsePhon('a')
+print(time.perf_counter() - start)
+print(' '.join(sys.modules))
+'''
+
+def cold_start(module, env):
+    """Returns the time to import the module and parse a phoneme, and the names of the loaded modules."""
+    output = subprocess.run(
+        [sys.executable, '-c', COLD_START_SCRIPT.format(module = module)],
+        cwd = HERE, env = env, capture_output = True, text = True, check = True
+    ).stdout.splitlines()
+    return float(output[0]), set(output[1].split())
+
+@pytest.mark.parametrize('module', ['IPAParser', 'IPATabulator', 'PhonoSearchLib'])
+def test_cold_start(module, tmp_path):
+    env = dict(os.environ, PYTHONPYCACHEPREFIX = str(tmp_path))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    cold_start(module, env) # Fills the bytecode cache.
+    runs = [cold_start(module, env) for i in range(COLD_START_RUNS)]
+    assert min(seconds for seconds, modules in runs) < COLD_START_LIMIT
+    # Heavy modules are only imported by the features that need them.
+    modules = runs[0][1]
+    assert 'multiprocessing' not in modules
+    assert 'numpy' not in modules
+    assert 're' not in modules
+
+LOOKUP_TABLES = {
+    'manner':   (IPAParser.MANNERS, IPAParser.MANNERS_NAMES),
+    'place':    (IPAParser.PLACES, IPAParser.PLACES_NAMES),
+    'position': (IPAParser.POSITIONS, IPAParser.POSITIONS_NAMES),
+    'openness': (IPAParser.OPENNESS, IPAParser.OPENNESS_NAMES)
+}
+
+class TableScan:
+    """Finds a glyph's feature name by scanning the lists of sets, as the parser did before glyphLookup."""
+
+    def __init__(self, name):
+        self.tables, self.names = LOOKUP_TABLES[name]
+
+    def get(self, glyph):
+        for i in range(len(self.tables)):
+            if glyph in self.tables[i]:
+                return self.names[i]
+        return None
+
+def test_glyph_lookup_matches_table_scan():
+    for name, (tables, names) in LOOKUP_TABLES.items():
+        lookup = IPAParser.glyphLookup(name)
+        for glyph in IPAParser.MAIN_GLYPHS:
+            # Every glyph is in at most one table, so the first match is the only one.
+            expected = [names[i] for i in range(len(tables)) if glyph in tables[i]]
+            assert ([lookup[glyph]] if glyph in lookup else []) == expected
+
+@pytest.mark.parametrize('diacritic', ['', 'ʰ', 'ʼ', 'ʷ', 'ʲ', 'ː', '̃', '̥', '̪'])
+def test_parse_matches_table_scan(diacritic, monkeypatch):
+    phonemes = [glyph + diacritic for glyph in sorted(IPAParser.MAIN_GLYPHS)]
+    phonemes += ['t' + glyph + diacritic for glyph in ['s', 'ʃ', 'ɬ', 'ɕ']]
+    phonemes += ['n' + glyph + diacritic for glyph in ['d', 'g', 'dʒ']]
+    expected = {}
+    with monkeypatch.context() as m:
+        m.setattr(IPAParser, 'glyphLookup', TableScan)
+        for phon in phonemes:
+            try:
+                expected[phon] = IPAParser.parsePhon(phon)
+            except Exception as e:
+                expected[phon] = repr(e)
+    for phon in phonemes:
+        try:
+            result = IPAParser.parsePhon(phon)
+        except Exception as e:
+            result = repr(e)
+        assert result == expected[phon], phon
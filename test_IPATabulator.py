@@ -0,0 +1,42 @@
+import re
+
+from IPATabulator import processInventory, renderTabulation, splitInventory, tabulateInventory, updateTabulation
+
+INVENTORY = "p, b, t, d, k, g, kʰ, m, n, s, ʃ, l, r, j, w, a, e, i, o, u, aː, iː, ã, ai, ɿ, eai"
+
+def apply(inventory, added, removed):
+    phonemes = [phon for phon in inventory.split(', ') if phon not in removed]
+    return ", ".join(phonemes + list(added))
+
+def test_process_inventory_uses_tabulation():
+    assert processInventory("x", INVENTORY) == renderTabulation("x", tabulateInventory(INVENTORY))
+
+def test_update_matches_full_rebuild():
+    tabulation = tabulateInventory(INVENTORY)
+    for added, removed in [(['q', 'ɛ', 'bʰ'], ['kʰ', 'ã']), (['p'], ['p']), (['oː'], []), (['au'], ['ai'])]:
+        updated, diff = updateTabulation(tabulation, added, removed)
+        assert renderTabulation("x", updated) == processInventory("x", apply(INVENTORY, added, removed))
+    assert renderTabulation("x", tabulation) == processInventory("x", INVENTORY)
+
+def test_unchanged_series_are_reused():
+    tabulation = tabulateInventory(INVENTORY)
+    updated, diff = updateTabulation(tabulation, ['q'], [])
+    assert updated['vowFragments']['long'] is tabulation['vowFragments']['long']
+    assert diff == [('consonant', 'plain', 'plosive', 'uvular', '', 'q')]
+
+def test_diff_reports_removed_series():
+    updated, diff = updateTabulation(tabulateInventory(INVENTORY), [], ['ã'])
+    assert 'nasalised' not in updated['vowFragments']
+    assert diff == [('vowel', 'nasalised', 'open', 'front', 'ã', '')]
+
+def test_diff_reports_listed_vowels():
+    updated, diff = updateTabulation(tabulateInventory(INVENTORY), ['au', 'ʅ'], ['ai', 'eai'])
+    assert sorted(diff) == [
+        ('apical_vowel', None, None, None, 'ɿ', 'ɿ, ʅ'),
+        ('diphthong', None, None, None, 'ai', 'au'),
+        ('triphthong', None, None, None, 'eai', '')
+    ]
+
+def test_split_inventory_matches_regex():
+    for phonoString in ['a, b ,c', ' a ,b ', 'a', '', ',', 'a,,b', 'a \t, b , c']:
+        assert splitInventory(phonoString) == re.split(r'\s*,\s*', phonoString)
@@ -0,0 +1,75 @@
+import pytest
+
+from PhonoSearchLib import LangSearchEngine, ShardedLangSearchEngine
+
+LANGS = [
+    ('A', ['g', 'p', 'b', 'a', 'i', 'u']),
+    ('B', ['ɡ', 'pʰ', 'i', 'e', 'o']),
+    ('C', ['k', 'kʼ', 'pʼ', 'tʼ', 'a', 'ai']),
+    ('D', ['g', 'k', 'p', 'm', 'n', 'i', 'iː']),
+    ('E', ['b', 'd', 'ɡ', 'a', 'ə'])
+]
+
+def make_engines(n_shards):
+    single = LangSearchEngine()
+    sharded = ShardedLangSearchEngine(n_shards)
+    for name, phonemes in LANGS:
+        single.add_language(name, phonemes)
+        sharded.add_language(name, phonemes)
+    return single, sharded
+
+@pytest.mark.parametrize('n_shards', [1, 2, 3])
+def test_sharded_matches_single(n_shards):
+    single, sharded = make_engines(n_shards)
+    with sharded:
+        for phoneme in ['g', 'p', 'i', 'a', 'kʼ']:
+            assert sharded.IPA_exact_query(phoneme) == single.IPA_exact_query(phoneme)
+            assert sharded.IPA_query(phoneme) == single.IPA_query(phoneme)
+        assert sharded.IPA_query_multiple('p', '-b') == single.IPA_query_multiple('p', '-b')
+        assert sharded.features_query('glottalised') == single.features_query('glottalised')
+        assert sharded.feature_rating('plosive') == single.feature_rating('plosive')
+        assert sharded.IPA_exact_query('ai') == single.IPA_exact_query('ai')
+        assert sharded.lang_dic == single.lang_dic
+        assert sharded.all_phonemes == single.all_phonemes
+
+def test_glyph_does_not_depend_on_partition():
+    with ShardedLangSearchEngine(2) as sharded:
+        sharded.add_language('A', ['g', 'a'])
+        sharded.add_language('B', ['ɡ', 'a'])
+        assert sharded.IPA_query('g') == {'g': ['A', 'B']}
+
+def test_error_does_not_leave_stale_replies():
+    single, sharded = make_engines(3)
+    with sharded:
+        with pytest.raises(Exception):
+            sharded.IPA_exact_query('ŋ̈x!')
+        assert sharded.IPA_exact_query('i') == single.IPA_exact_query('i')
+
+def test_closed_engine():
+    sharded = ShardedLangSearchEngine(2)
+    sharded.close()
+    with pytest.raises(Exception, match = 'closed'):
+        sharded.add_language('A', ['a'])
+    with pytest.raises(Exception, match = 'closed'):
+        sharded.features_query('vowel')
+
+def test_context_manager_stops_workers():
+    with ShardedLangSearchEngine(2) as sharded:
+        processes = list(sharded.processes)
+    assert not any(process.is_alive() for process in processes)
+
+def test_failed_addition_matches_single():
+    single = LangSearchEngine()
+    with ShardedLangSearchEngine(2) as sharded:
+        for engine in (single, sharded):
+            engine.add_language('A', ['a', 'p'])
+            with pytest.raises(Exception):
+                engine.add_language('C', ['t', 'x!'])
+        assert sharded.all_langs == single.all_langs == {'A', 'C'}
+        assert sharded.features_query('-vowel') == single.features_query('-vowel')
+
+def test_feature_matrix():
+    pytest.importorskip('numpy')
+    single, sharded = make_engines(2)
+    with sharded:
+        assert sharded.feature_matrix().rating('plosive') == single.feature_matrix().rating('plosive')